@@ -1,26 +1,33 @@
 from __future__ import annotations
 
-import json
+import os
 from pathlib import Path
 from typing import Any
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+import orjson
+from fastapi import APIRouter, File, Form, HTTPException, Response, UploadFile
 from fastapi.responses import FileResponse
 
 from .config import settings
 from .models import CreateJobResponse, JobStatus, JobStatusResponse
+from .pipeline.factory import select_options
 from .tts_service import ensure_audio_for_request
 
 
 router = APIRouter(prefix="/api/v1")
 
+# Settings are fixed for the process lifetime; status polling reads this on every request.
+_GENERATOR_BACKEND = settings.generator_backend
+
 
 def _safe_options(options_raw: str | None) -> dict[str, Any]:
     if not options_raw:
         return {}
     try:
-        value = json.loads(options_raw)
-    except json.JSONDecodeError as e:
+        # orjson reuses cached str objects for short keys, so the recurring option names
+        # (`svd_num_frames`, `sadtalker_size`, ...) aren't re-allocated on every request.
+        value = orjson.loads(options_raw)
+    except orjson.JSONDecodeError as e:
         raise HTTPException(status_code=400, detail=f"Invalid options JSON: {e.msg}") from e
     if not isinstance(value, dict):
         raise HTTPException(status_code=400, detail="Options must be a JSON object")
@@ -43,31 +50,31 @@ async def create_job(
         raise HTTPException(status_code=400, detail="Provide exactly one of: text or audio")
 
     from .state import job_queue, job_store
-    from .jobs import ensure_dir, storage_paths_for_job
+    from .jobs import ensure_dir, save_upload, storage_paths_for_job
 
-    job_options = _safe_options(options)
+    # Unused keys are dropped so they neither ride along with the job nor split the cache key.
+    job_options = select_options(_GENERATOR_BACKEND, _safe_options(options))
     # Allocate a job id and dedicated folders first.
     from uuid import uuid4
 
     job_id = str(uuid4())
     paths = storage_paths_for_job(job_id)
-    ensure_dir(paths["uploads_dir"])
-    ensure_dir(paths["outputs_dir"])
+    ensure_dir(paths.uploads_dir)
+    ensure_dir(paths.outputs_dir)
 
     # Save image.
-    image_path = paths["uploads_dir"] / f"image{Path(image.filename).suffix or '.png'}"
-    with image_path.open("wb") as f:
-        f.write(await image.read())
+    image_path = paths.uploads_dir / f"image{Path(image.filename).suffix or '.png'}"
+    image_sha256 = await save_upload(image, image_path)
 
     # Prepare / save audio.
-    audio_path = await ensure_audio_for_request(
+    audio_path, audio_sha256 = await ensure_audio_for_request(
         job_id=job_id,
-        uploads_dir=paths["uploads_dir"],
+        uploads_dir=paths.uploads_dir,
         text=(text or "").strip() if has_text else None,
         audio_file=audio if has_audio else None,
     )
 
-    output_video_path = paths["video_path"]
+    output_video_path = paths.video_path
 
     job = await job_store.create(
         job_id=job_id,
@@ -75,6 +82,8 @@ async def create_job(
         input_audio_path=audio_path,
         output_video_path=output_video_path,
         options=job_options,
+        input_image_sha256=image_sha256,
+        input_audio_sha256=audio_sha256,
     )
 
     await job_queue.enqueue(job.job_id)
@@ -93,17 +102,20 @@ async def get_job(job_id: str):
     if job.status == JobStatus.succeeded:
         result_url = f"/api/v1/jobs/{job_id}/result"
 
-    return JobStatusResponse(
+    # Serialize straight to JSON bytes; returning a Response skips FastAPI's second
+    # validate/encode pass over `response_model` (which stays for the OpenAPI schema).
+    body = JobStatusResponse(
         job_id=job.job_id,
         status=job.status,
-        generator_backend=settings.generator_backend,
+        generator_backend=_GENERATOR_BACKEND,
         created_at=job.created_at,
         updated_at=job.updated_at,
         progress=job.progress,
         message=job.message,
         error=job.error,
         result_url=result_url,
-    )
+    ).model_dump_json()
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/jobs/{job_id}/result")
@@ -115,11 +127,15 @@ async def get_job_result(job_id: str):
         raise HTTPException(status_code=404, detail="Job not found")
     if job.status != JobStatus.succeeded:
         raise HTTPException(status_code=409, detail=f"Job is not ready (status={job.status})")
-    if not job.output_video_path.exists():
-        raise HTTPException(status_code=500, detail="Result file is missing on server")
+    try:
+        stat_result = os.stat(job.output_video_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=500, detail="Result file is missing on server") from None
 
+    # Starlette sends it via `http.response.pathsend` where the server supports that.
     return FileResponse(
         path=str(job.output_video_path),
         media_type="video/mp4",
         filename=f"{job_id}.mp4",
+        stat_result=stat_result,
     )
@@ -26,6 +26,15 @@ class Settings(BaseSettings):
     cache_dirname: str = "cache"
     enable_cache: bool = True
 
+    # Job queue/state backend. `redis` lets several server processes share one queue.
+    queue_backend: str = "memory"  # memory | redis
+    redis_url: str = "redis://localhost:6379/0"
+
+    # Worker: jobs handled concurrently per process (upload/cache/metadata I/O overlaps),
+    # and how many of them may run the generator at once (GPU backends want 1).
+    worker_concurrency: int = 2
+    generator_concurrency: int = 1
+
     # Frontend dev server defaults (Vite).
     cors_allow_origins: list[str] = [
         "http://localhost:5173",
@@ -70,12 +79,19 @@ class Settings(BaseSettings):
     svd_seed: int | None = None
     # x264 constant rate factor (0..51). Lower means better visual quality / larger files.
     svd_encode_crf: int = 18
+    # H.264 encoder: auto (NVENC on CUDA, else libx264) | libx264 | h264_nvenc | h264_qsv | h264_videotoolbox.
+    svd_encoder: str = "auto"
 
     svd_enable_attention_slicing: bool = True
     svd_enable_vae_slicing: bool = True
     svd_enable_vae_tiling: bool = False
     svd_enable_cpu_offload: bool = False
+    # CUDA only: sequential CPU offload + sliced/tiled VAE + decode_chunk_size=1, for small GPUs.
+    svd_low_vram: bool = False
     svd_enable_xformers: bool = True
+    # CUDA only: torch.compile the UNet/VAE decoder. The first job pays the compile cost; later
+    # jobs with the same resolution/frame count run faster. A compile error falls back to eager.
+    svd_compile: bool = False
 
     # Since SVD doesn't use audio for motion, we can extend (freeze/loop) the
     # generated frames to match the audio duration for nicer UX.
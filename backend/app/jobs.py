@@ -1,21 +1,33 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import hashlib
+import os
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 from uuid import uuid4
 
+import orjson
+from fastapi import UploadFile
+
 from .config import settings
 from .models import JobStatus
 
+# Uploads are copied to disk in fixed-size chunks so large files never sit in RAM whole.
+UPLOAD_CHUNK_SIZE = 1 << 20
+
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def canonical_options(options: dict[str, Any]) -> str:
+    # Stable text form (sorted keys, no whitespace): computed once per job, hashed into cache keys.
+    return orjson.dumps(options, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+
+
 @dataclass(slots=True)
 class Job:
     job_id: str
@@ -29,12 +41,20 @@ class Job:
     input_audio_path: Path
     output_video_path: Path
     options: dict[str, Any]
+    options_canonical: str
+    # SHA-256 of the inputs, when known from the upload itself (saves the worker a read pass).
+    input_image_sha256: str | None = None
+    input_audio_sha256: str | None = None
 
 
 class JobStore:
+    # Single-process, single-event-loop store: every access runs on the loop thread and
+    # never awaits mid-operation, so plain dict/attribute access needs no lock.
+    # Multiple server processes need a shared store instead.
     def __init__(self) -> None:
         self._jobs: dict[str, Job] = {}
-        self._lock = asyncio.Lock()
+        # Job ids per status, so status queries never walk every Job object.
+        self._ids_by_status: dict[JobStatus, set[str]] = {status: set() for status in JobStatus}
 
     async def create(
         self,
@@ -44,6 +64,8 @@ class JobStore:
         input_audio_path: Path,
         output_video_path: Path,
         options: dict[str, Any],
+        input_image_sha256: str | None = None,
+        input_audio_sha256: str | None = None,
     ) -> Job:
         job_id = job_id or str(uuid4())
         now = _utcnow()
@@ -59,14 +81,19 @@ class JobStore:
             input_audio_path=input_audio_path,
             output_video_path=output_video_path,
             options=options,
+            options_canonical=canonical_options(options),
+            input_image_sha256=input_image_sha256,
+            input_audio_sha256=input_audio_sha256,
         )
-        async with self._lock:
-            self._jobs[job_id] = job
+        self._jobs[job_id] = job
+        self._ids_by_status[job.status].add(job_id)
         return job
 
     async def get(self, job_id: str) -> Job | None:
-        async with self._lock:
-            return self._jobs.get(job_id)
+        return self._jobs.get(job_id)
+
+    async def count_by_status(self) -> dict[JobStatus, int]:
+        return {status: len(ids) for status, ids in self._ids_by_status.items()}
 
     async def update(
         self,
@@ -77,20 +104,21 @@ class JobStore:
         message: str | None = None,
         error: str | None = None,
     ) -> Job | None:
-        async with self._lock:
-            job = self._jobs.get(job_id)
-            if job is None:
-                return None
-            if status is not None:
-                job.status = status
-            if progress is not None:
-                job.progress = float(progress)
-            if message is not None:
-                job.message = message
-            if error is not None:
-                job.error = error
-            job.updated_at = _utcnow()
-            return job
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if status is not None and status != job.status:
+            self._ids_by_status[job.status].discard(job_id)
+            self._ids_by_status[status].add(job_id)
+            job.status = status
+        if progress is not None:
+            job.progress = float(progress)
+        if message is not None:
+            job.message = message
+        if error is not None:
+            job.error = error
+        job.updated_at = _utcnow()
+        return job
 
 
 class JobQueue:
@@ -104,38 +132,76 @@ class JobQueue:
         return await self._queue.get()
 
 
-def storage_paths_for_job(job_id: str) -> dict[str, Path]:
-    base = settings.storage_dir
-    uploads = base / settings.uploads_dirname / job_id
-    outputs = base / settings.outputs_dirname / job_id
-    return {
-        "uploads_dir": uploads,
-        "outputs_dir": outputs,
-        "image_path": uploads / "image",
-        "audio_path": uploads / "audio",
-        "video_path": outputs / "result.mp4",
-        "meta_path": outputs / "job.json",
-    }
+# Storage roots are fixed for the process lifetime, so join them once.
+_UPLOADS_ROOT = os.path.join(settings.storage_dir, settings.uploads_dirname)
+_OUTPUTS_ROOT = os.path.join(settings.storage_dir, settings.outputs_dirname)
+
+
+@dataclass(slots=True, frozen=True)
+class JobPaths:
+    uploads_dir: Path
+    outputs_dir: Path
+    video_path: Path
+    meta_path: Path
+
+
+def storage_paths_for_job(job_id: str) -> JobPaths:
+    outputs = os.path.join(_OUTPUTS_ROOT, job_id)
+    return JobPaths(
+        uploads_dir=Path(_UPLOADS_ROOT, job_id),
+        outputs_dir=Path(outputs),
+        video_path=Path(outputs, "result.mp4"),
+        meta_path=Path(outputs, "job.json"),
+    )
 
 
 def ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
-def persist_job_meta(job: Job) -> None:
-    paths = storage_paths_for_job(job.job_id)
-    ensure_dir(paths["outputs_dir"])
+def _copy_upload(src: BinaryIO, path: Path) -> str:
+    hasher = hashlib.sha256()
+    with path.open("wb") as f:
+        while chunk := src.read(UPLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+            f.write(chunk)
+    return hasher.hexdigest()
+
+
+async def save_upload(upload: UploadFile, path: Path) -> str:
+    """Copy the upload to `path`; returns its SHA-256 hex digest, hashed as the chunks pass by."""
+    # The whole copy loop runs in one worker thread, so no disk I/O happens on the event loop.
+    return await asyncio.to_thread(_copy_upload, upload.file, path)
+
+
+def _job_meta_bytes(job: Job) -> bytes:
     meta = {
         "job_id": job.job_id,
         "status": job.status,
-        "created_at": job.created_at.isoformat(),
-        "updated_at": job.updated_at.isoformat(),
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
         "progress": job.progress,
         "message": job.message,
         "error": job.error,
-        "input_image_path": str(job.input_image_path),
-        "input_audio_path": str(job.input_audio_path),
-        "output_video_path": str(job.output_video_path),
+        "input_image_path": job.input_image_path,
+        "input_audio_path": job.input_audio_path,
+        "output_video_path": job.output_video_path,
         "options": job.options,
     }
-    paths["meta_path"].write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    # orjson handles datetimes/enums natively; `default=str` covers the Path values.
+    return orjson.dumps(meta, default=str, option=orjson.OPT_INDENT_2)
+
+
+def _write_job_meta(paths: JobPaths, meta_bytes: bytes) -> None:
+    ensure_dir(paths.outputs_dir)
+    paths.meta_path.write_bytes(meta_bytes)
+
+
+def persist_job_meta(job: Job) -> None:
+    _write_job_meta(storage_paths_for_job(job.job_id), _job_meta_bytes(job))
+
+
+async def persist_job_meta_async(job: Job) -> None:
+    # Serialize on the loop (a consistent snapshot of `job`), do the disk I/O in a thread.
+    meta_bytes = _job_meta_bytes(job)
+    await asyncio.to_thread(_write_job_meta, storage_paths_for_job(job.job_id), meta_bytes)
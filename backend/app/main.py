@@ -4,14 +4,21 @@ import asyncio
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from .api import router as api_router
 from .config import settings
+from .state import job_store
 from .worker import worker_loop
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="AI Video Avatar Studio", version="0.1.0")
+    app = FastAPI(
+        title="AI Video Avatar Studio",
+        version="0.1.0",
+        # orjson (already a dependency) renders every plain JSON endpoint.
+        default_response_class=ORJSONResponse,
+    )
 
     app.add_middleware(
         CORSMiddleware,
@@ -24,22 +31,28 @@ def create_app() -> FastAPI:
     app.include_router(api_router)
 
     stop_event = asyncio.Event()
-    worker_task: asyncio.Task[None] | None = None
+    worker_tasks: list[asyncio.Task[None]] = []
 
     @app.on_event("startup")
     async def _startup() -> None:
-        nonlocal worker_task
-        worker_task = asyncio.create_task(worker_loop(stop_event))
+        generator_slots = asyncio.Semaphore(max(1, settings.generator_concurrency))
+        for _ in range(max(1, settings.worker_concurrency)):
+            worker_tasks.append(asyncio.create_task(worker_loop(stop_event, generator_slots)))
 
     @app.on_event("shutdown")
     async def _shutdown() -> None:
         stop_event.set()
-        if worker_task:
-            worker_task.cancel()
+        for task in worker_tasks:
+            task.cancel()
 
     @app.get("/health")
     async def health():
-        return {"status": "ok", "generator_backend": settings.generator_backend}
+        counts = await job_store.count_by_status()
+        return {
+            "status": "ok",
+            "generator_backend": settings.generator_backend,
+            "jobs": {status.value: count for status, count in counts.items()},
+        }
 
     return app
 
@@ -1,13 +1,24 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any, Callable, Protocol
+from typing import Any, Callable, ClassVar, Protocol
 
 ProgressCallback = Callable[[float, str], None]
 
 
 class AvatarVideoGenerator(Protocol):
-    def generate(
+    """
+    One instance per backend is shared by every job (see `factory.build_generator`).
+
+    Long-lived caches (e.g. loaded model weights) may live on `self`; per-job data must not.
+    `generate` runs on the worker's event loop, so blocking work belongs in a subprocess
+    or `asyncio.to_thread`.
+    """
+
+    # Job option keys `generate` reads; anything else is dropped at submission.
+    option_keys: ClassVar[frozenset[str]]
+
+    async def generate(
         self,
         *,
         image_path: Path,
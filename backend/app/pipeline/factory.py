@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import functools
+from typing import Any
+
 from .base import AvatarVideoGenerator
 from .mock_generator import MockAvatarVideoGenerator
 from .sadtalker_generator import SadTalkerAvatarVideoGenerator
@@ -8,16 +11,39 @@ from .svd_controlnet_generator import SVDControlNetAvatarVideoGenerator
 from .wav2lip_generator import Wav2LipAvatarVideoGenerator
 
 
-def build_generator(backend_name: str) -> AvatarVideoGenerator:
-    name = (backend_name or "mock").strip().lower()
+def _normalize_backend_name(backend_name: str) -> str:
+    return (backend_name or "mock").strip().lower()
+
+
+def _generator_class(backend_name: str) -> type[AvatarVideoGenerator]:
+    name = _normalize_backend_name(backend_name)
     if name == "mock":
-        return MockAvatarVideoGenerator()
+        return MockAvatarVideoGenerator
     if name == "sadtalker":
-        return SadTalkerAvatarVideoGenerator()
+        return SadTalkerAvatarVideoGenerator
     if name == "wav2lip":
-        return Wav2LipAvatarVideoGenerator()
+        return Wav2LipAvatarVideoGenerator
     if name == "svd":
-        return StableVideoDiffusionAvatarVideoGenerator()
+        return StableVideoDiffusionAvatarVideoGenerator
     if name in {"svd+controlnet", "controlnet"}:
-        return SVDControlNetAvatarVideoGenerator()
+        return SVDControlNetAvatarVideoGenerator
     raise ValueError(f"Unknown generator backend: {backend_name!r}")
+
+
+def build_generator(backend_name: str) -> AvatarVideoGenerator:
+    """Return the shared generator instance for a backend (created on first use)."""
+    return _build_generator(_normalize_backend_name(backend_name))
+
+
+@functools.lru_cache(maxsize=None)
+def _build_generator(name: str) -> AvatarVideoGenerator:
+    return _generator_class(name)()
+
+
+def select_options(backend_name: str, options: dict[str, Any]) -> dict[str, Any]:
+    """Keep only the option keys the backend's generator actually reads."""
+    cls = _generator_class(backend_name)
+    selected = {k: v for k, v in options.items() if k in cls.option_keys}
+    # Optional per-backend hook to drop or fix invalid values before they reach the job.
+    normalize = getattr(cls, "normalize_options", None)
+    return normalize(selected) if normalize is not None else selected
@@ -1,13 +1,25 @@
 from __future__ import annotations
 
+import asyncio
 import shutil
 import subprocess
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any
 
 from ..config import settings
 from .base import ProgressCallback
 
+_FFMPEG = shutil.which("ffmpeg")
+
+X264_PRESETS = frozenset(
+    {"ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow", "placebo"}
+)
+
+
+def _is_x264_preset(value: Any) -> bool:
+    # Options come from client JSON, so the value may be any type (including unhashable ones).
+    return isinstance(value, str) and value in X264_PRESETS
+
 
 class MockAvatarVideoGenerator:
     """
@@ -16,7 +28,21 @@ class MockAvatarVideoGenerator:
     This is a placeholder for real pipelines (SadTalker/Wav2Lip/SVD+ControlNet).
     """
 
-    def generate(
+    option_keys = frozenset({"video_size", "video_fps", "mock_preset"})
+
+    @staticmethod
+    def normalize_options(options: dict[str, Any]) -> dict[str, Any]:
+        # An unknown preset would only fail in ffmpeg; drop it so the job (and its cache key)
+        # is the same as one that left it at the default.
+        if "mock_preset" in options and not _is_x264_preset(options["mock_preset"]):
+            options = {k: v for k, v in options.items() if k != "mock_preset"}
+        return options
+
+    def __init__(self) -> None:
+        self._default_size = settings.video_size
+        self._default_fps = settings.video_fps
+
+    async def generate(
         self,
         *,
         image_path: Path,
@@ -25,15 +51,18 @@ class MockAvatarVideoGenerator:
         options: dict[str, Any],
         progress_cb: ProgressCallback,
     ) -> None:
-        ffmpeg = shutil.which("ffmpeg")
+        ffmpeg = _FFMPEG
         if not ffmpeg:
             raise RuntimeError(
                 "ffmpeg is required for the demo generator. "
                 "Install it and retry (macOS: `brew install ffmpeg`)."
             )
 
-        size = int(options.get("video_size", settings.video_size))
-        fps = int(options.get("video_fps", settings.video_fps))
+        size = int(options.get("video_size", self._default_size))
+        fps = int(options.get("video_fps", self._default_fps))
+        preset = options.get("mock_preset")
+        if not _is_x264_preset(preset):
+            preset = "ultrafast"
 
         progress_cb(0.1, "Encoding video")
         output_video_path.parent.mkdir(parents=True, exist_ok=True)
@@ -51,6 +80,7 @@ class MockAvatarVideoGenerator:
             "-hide_banner",
             "-loglevel",
             "error",
+            # Input rate = output rate, so `-shortest` can cut at any frame, not a whole second.
             "-loop",
             "1",
             "-framerate",
@@ -64,16 +94,18 @@ class MockAvatarVideoGenerator:
             "-c:v",
             "libx264",
             "-preset",
-            "veryfast",
-            "-tune",
-            "stillimage",
+            preset,
+            "-threads",
+            "0",
             "-c:a",
             "aac",
             "-b:a",
             "192k",
+            "-movflags",
+            "+faststart",
             "-shortest",
             str(output_video_path),
         ]
 
-        subprocess.run(cmd, check=True)
+        await asyncio.to_thread(subprocess.run, cmd, check=True)
         progress_cb(1.0, "Done")
@@ -1,19 +1,75 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import os
+import re
 import shutil
 import subprocess
 import sys
+from collections import deque
 from pathlib import Path
 from typing import Any
 
 from ..config import settings
 from .base import ProgressCallback
 
+# tqdm bars, e.g. "Face Renderer::  45%|████▌     | 9/20 [00:03<00:04,  2.61it/s]".
+_TQDM_RE = re.compile(r"^\s*(?P<desc>[^|\r\n]*?):*\s*(?P<pct>\d{1,3})%\|")
+_OUTPUT_TAIL_LINES = 200
+_LINE_SPLIT_RE = re.compile(rb"[\r\n]")
+_FFMPEG = shutil.which("ffmpeg")
 
-def _transcode_to_browser_h264(path: Path) -> None:
-    ffmpeg = shutil.which("ffmpeg")
+
+async def _iter_output_lines(stream: asyncio.StreamReader):
+    # StreamReader.readline() only splits on "\n"; tqdm redraws with "\r", so split on both.
+    pending = b""
+    while chunk := await stream.read(64 * 1024):
+        *lines, pending = _LINE_SPLIT_RE.split(pending + chunk)
+        for line in lines:
+            yield line.decode("utf-8", errors="replace")
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+
+def _newest_mp4(root: Path) -> Path | None:
+    """Newest `*.mp4` directly in `root`, else the newest anywhere below it."""
+    best: str | None = None
+    best_mtime = -1.0
+    pending = [str(root)]
+    top_level = True
+    while pending:
+        subdirs: list[str] = []
+        for dir_path in pending:
+            with os.scandir(dir_path) as it:
+                # DirEntry caches the file type, so each mp4 costs a single stat call.
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.endswith(".mp4") and entry.is_file():
+                        mtime = entry.stat().st_mtime
+                        if mtime > best_mtime:
+                            best, best_mtime = entry.path, mtime
+        # Top-level results win, like the old glob() before the rglob() fallback.
+        if top_level and best is not None:
+            break
+        top_level = False
+        pending = subdirs
+    return Path(best) if best is not None else None
+
+
+def _move_file(src: Path, dst: Path) -> None:
+    try:
+        os.replace(src, dst)  # same filesystem: a rename, no bytes copied
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _transcode_to_browser_h264(src: Path, path: Path) -> None:
+    """Write `src` to `path` as browser-friendly H.264 (or just move it without ffmpeg)."""
+    ffmpeg = _FFMPEG
     if not ffmpeg:
+        _move_file(src, path)
         return
 
     temp_path = path.with_name(path.stem + ".h264.tmp.mp4")
@@ -25,7 +81,7 @@ def _transcode_to_browser_h264(path: Path) -> None:
             "-loglevel",
             "error",
             "-i",
-            str(path),
+            str(src),
             "-c:v",
             "libx264",
             "-pix_fmt",
@@ -57,8 +113,46 @@ def _transcode_to_browser_h264(path: Path) -> None:
     temp_path.replace(path)
 
 
+@functools.lru_cache(maxsize=8)
+def _resolve_runtime(repo_dir_opt: str, python_opt: str | None) -> tuple[Path, Path, str]:
+    """Resolve (repo_dir, inference.py, python command) once per distinct setting/override."""
+    repo_dir = Path(repo_dir_opt).resolve()
+    inference_py = repo_dir / "inference.py"
+    if not inference_py.exists():
+        raise RuntimeError(
+            "SadTalker repo not found. Expected `inference.py` at: "
+            f"{inference_py}. Clone SadTalker into that folder or set "
+            "`AVATAR_SADTALKER_REPO_DIR` (or pass `sadtalker_repo_dir` in options)."
+        )
+
+    python_exec = Path(python_opt).expanduser() if python_opt else None
+    # Important: do NOT call `.resolve()` here — venv `python` is often a symlink to the base
+    # interpreter, and resolving it would bypass the venv site-packages (leading to missing torch).
+    if python_exec and not python_exec.is_absolute():
+        python_exec = (Path.cwd() / python_exec).absolute()
+    elif python_exec:
+        python_exec = python_exec.absolute()
+    if python_exec and not python_exec.exists():
+        raise RuntimeError(f"SadTalker python not found: {python_exec}")
+    python_cmd = str(python_exec) if python_exec else sys.executable
+    return repo_dir, inference_py, python_cmd
+
+
 class SadTalkerAvatarVideoGenerator:
-    def generate(
+    option_keys = frozenset(
+        {
+            "sadtalker_repo_dir",
+            "sadtalker_python",
+            "sadtalker_size",
+            "sadtalker_preprocess",
+            "sadtalker_enhancer",
+            "sadtalker_still",
+            "sadtalker_cpu",
+            "sadtalker_extra_args",
+        }
+    )
+
+    async def generate(
         self,
         *,
         image_path: Path,
@@ -67,30 +161,16 @@ class SadTalkerAvatarVideoGenerator:
         options: dict[str, Any],
         progress_cb: ProgressCallback,
     ) -> None:
-        image_path = image_path.resolve()
-        audio_path = audio_path.resolve()
-        output_video_path = output_video_path.resolve()
+        # SadTalker runs with cwd=repo_dir, so the job paths must be absolute; abspath is pure
+        # string work, unlike resolve() which stats every path component.
+        image_path_str = os.path.abspath(image_path)
+        audio_path_str = os.path.abspath(audio_path)
+        output_video_path = Path(os.path.abspath(output_video_path))
 
-        repo_dir = Path(options.get("sadtalker_repo_dir") or settings.sadtalker_repo_dir).resolve()
-        inference_py = repo_dir / "inference.py"
-        if not inference_py.exists():
-            raise RuntimeError(
-                "SadTalker repo not found. Expected `inference.py` at: "
-                f"{inference_py}. Clone SadTalker into that folder or set "
-                "`AVATAR_SADTALKER_REPO_DIR` (or pass `sadtalker_repo_dir` in options)."
-            )
-
-        python_path_opt = options.get("sadtalker_python") or settings.sadtalker_python
-        python_exec = Path(python_path_opt).expanduser() if python_path_opt else None
-        # Important: do NOT call `.resolve()` here — venv `python` is often a symlink to the base
-        # interpreter, and resolving it would bypass the venv site-packages (leading to missing torch).
-        if python_exec and not python_exec.is_absolute():
-            python_exec = (Path.cwd() / python_exec).absolute()
-        elif python_exec:
-            python_exec = python_exec.absolute()
-        if python_exec and not python_exec.exists():
-            raise RuntimeError(f"SadTalker python not found: {python_exec}")
-        python_cmd = str(python_exec) if python_exec else sys.executable
+        repo_dir, inference_py, python_cmd = _resolve_runtime(
+            str(options.get("sadtalker_repo_dir") or settings.sadtalker_repo_dir),
+            str(options.get("sadtalker_python") or settings.sadtalker_python or "") or None,
+        )
 
         size = int(options.get("sadtalker_size") or settings.sadtalker_size)
         preprocess = str(options.get("sadtalker_preprocess") or settings.sadtalker_preprocess)
@@ -107,9 +187,9 @@ class SadTalkerAvatarVideoGenerator:
             python_cmd,
             str(inference_py),
             "--driven_audio",
-            str(audio_path),
+            audio_path_str,
             "--source_image",
-            str(image_path),
+            image_path_str,
             "--checkpoint_dir",
             str(repo_dir / "checkpoints"),
             "--result_dir",
@@ -135,26 +215,52 @@ class SadTalkerAvatarVideoGenerator:
         env["PYTHONPATH"] = str(repo_dir) + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
 
         progress_cb(0.2, "SadTalker: generating video")
-        completed = subprocess.run(cmd, cwd=str(repo_dir), env=env, text=True, capture_output=True)
-        if completed.returncode != 0:
-            tail = (completed.stderr or completed.stdout or "").strip()
+        # Stream the (very chatty) output instead of buffering all of it; only a bounded tail
+        # is kept for the error message.
+        tail_lines: deque[str] = deque(maxlen=_OUTPUT_TAIL_LINES)
+        frac = 0.0
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=str(repo_dir),
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        assert proc.stdout is not None
+        try:
+            async for line in _iter_output_lines(proc.stdout):
+                line = line.rstrip()
+                if not line:
+                    continue
+                tail_lines.append(line)
+                m = _TQDM_RE.match(line)
+                if m:
+                    # SadTalker runs several bars in a row; never move the overall progress back.
+                    frac = max(frac, min(100, int(m.group("pct"))) / 100.0)
+                    desc = m.group("desc").strip() or "generating video"
+                    progress_cb(0.2 + 0.7 * frac, f"SadTalker: {desc} {m.group('pct')}%")
+            await proc.wait()
+        except BaseException:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        if proc.returncode != 0:
+            tail = "\n".join(tail_lines).strip()
             if len(tail) > 4000:
                 tail = tail[-4000:]
             raise RuntimeError(
-                f"SadTalker failed with exit code {completed.returncode}"
+                f"SadTalker failed with exit code {proc.returncode}"
                 + (f"\n\n--- SadTalker output ---\n{tail}" if tail else "")
             )
 
         progress_cb(0.9, "SadTalker: collecting result")
-        candidates = list(result_dir.glob("*.mp4"))
-        if not candidates:
-            candidates = list(result_dir.rglob("*.mp4"))
-        if not candidates:
+        newest = _newest_mp4(result_dir)
+        if newest is None:
             raise RuntimeError(f"SadTalker produced no mp4 in {result_dir}")
-        newest = max(candidates, key=lambda p: p.stat().st_mtime)
 
         output_video_path.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copyfile(newest, output_video_path)
-        _transcode_to_browser_h264(output_video_path)
+        # Transcode straight from SadTalker's file; no intermediate copy of the mp4.
+        await asyncio.to_thread(_transcode_to_browser_h264, newest, output_video_path)
 
         progress_cb(1.0, "Done")
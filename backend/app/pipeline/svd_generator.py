@@ -1,17 +1,22 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import inspect
 import math
 import shutil
 import subprocess
-import tempfile
 import wave
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 from ..config import settings
 from .base import ProgressCallback
 
+_FFMPEG = shutil.which("ffmpeg")
+_FFPROBE = shutil.which("ffprobe")
+
 
 def _coerce_bool(value: object, default: bool) -> bool:
     if value is None:
@@ -31,8 +36,29 @@ def _round_down_to_multiple(value: int, multiple: int) -> int:
     return max(multiple, int(value // multiple) * multiple)
 
 
-def _get_media_duration_seconds(path: Path) -> float | None:
-    ffprobe = shutil.which("ffprobe")
+def _wav_duration_seconds(path: Path) -> float | None:
+    try:
+        with wave.open(str(path), "rb") as wf:
+            frames = wf.getnframes()
+            rate = wf.getframerate() or 0
+    except Exception:
+        return None
+    if rate <= 0:
+        return None
+    return float(frames) / float(rate)
+
+
+@functools.lru_cache(maxsize=128)
+def _media_duration_for_fingerprint(path: str, _size: int, _mtime_ns: int) -> float | None:
+    # WAV (what TTS and audio conversion produce) is read from its header; ffprobe is only
+    # spawned for other formats or headers `wave` can't parse.
+    media_path = Path(path)
+    if media_path.suffix.lower() == ".wav":
+        duration = _wav_duration_seconds(media_path)
+        if duration is not None:
+            return duration
+
+    ffprobe = _FFPROBE
     if ffprobe:
         completed = subprocess.run(
             [
@@ -43,7 +69,7 @@ def _get_media_duration_seconds(path: Path) -> float | None:
                 "format=duration",
                 "-of",
                 "default=noprint_wrappers=1:nokey=1",
-                str(path),
+                path,
             ],
             text=True,
             capture_output=True,
@@ -55,44 +81,218 @@ def _get_media_duration_seconds(path: Path) -> float | None:
             except ValueError:
                 return None
 
-    if path.suffix.lower() == ".wav":
-        try:
-            with wave.open(str(path), "rb") as wf:
-                frames = wf.getnframes()
-                rate = wf.getframerate() or 0
-            if rate <= 0:
-                return None
-            return float(frames) / float(rate)
-        except Exception:
-            return None
-
     return None
 
 
-def _frame_is_near_black(frame: Any, max_value: int = 6) -> bool:
+def _get_media_duration_seconds(path: Path) -> float | None:
     try:
-        pil_frame = frame.convert("RGB") if hasattr(frame, "convert") else frame
-        extrema = pil_frame.getextrema()
-    except Exception:
-        return False
+        st = path.stat()
+    except OSError:
+        return None
+    return _media_duration_for_fingerprint(str(path), st.st_size, st.st_mtime_ns)
+
 
-    # RGB image: extrema is ((min,max), (min,max), (min,max)).
-    if isinstance(extrema, tuple) and extrema and isinstance(extrema[0], tuple):
-        return all(int(ch_max) <= max_value for _ch_min, ch_max in extrema)
+def _frames_to_uint8(frames: Any) -> Any:
+    """(N, H, W, 3) uint8 array from pipeline frames (float array in [0, 1], or PIL images)."""
+    import numpy as np
 
-    # Single channel image: extrema is (min,max).
-    if isinstance(extrema, tuple) and len(extrema) == 2:
-        return int(extrema[1]) <= max_value
-    return False
+    if isinstance(frames, np.ndarray):
+        if frames.dtype == np.uint8:
+            return frames
+        return (np.clip(frames, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+    # Older diffusers without `output_type`: a list of PIL images.
+    return np.stack([np.asarray(frame.convert("RGB")) for frame in frames])
 
 
-def _looks_like_all_black_video(frames: list[Any]) -> bool:
-    if not frames:
+def _frame_is_near_black(frame: Any, max_value: int = 6) -> bool:
+    return int(frame.max()) <= max_value
+
+
+def _looks_like_all_black_video(frames: Any) -> bool:
+    if len(frames) == 0:
         return False
     idxs = sorted({0, len(frames) // 2, len(frames) - 1})
     return all(_frame_is_near_black(frames[idx]) for idx in idxs)
 
 
+@functools.lru_cache(maxsize=4)
+def _available_encoders(ffmpeg: str) -> frozenset[str]:
+    completed = subprocess.run([ffmpeg, "-hide_banner", "-encoders"], text=True, capture_output=True)
+    if completed.returncode != 0:
+        return frozenset()
+    # Lines look like " V....D h264_nvenc           NVIDIA NVENC H.264 encoder".
+    names = set()
+    for line in completed.stdout.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].startswith("V"):
+            names.add(parts[1])
+    return frozenset(names)
+
+
+# Encoders that produce browser-playable H.264; anything else requested falls back to `auto`.
+SVD_ENCODERS = frozenset({"libx264", "h264_nvenc", "h264_qsv", "h264_videotoolbox"})
+
+
+def _select_encoder(ffmpeg: str, requested: str, device: str) -> str:
+    if requested != "auto":
+        return requested
+    # NVENC honors the CRF (as `-cq`); VideoToolbox has no equivalent, so it stays opt-in.
+    if device == "cuda" and "h264_nvenc" in _available_encoders(ffmpeg):
+        return "h264_nvenc"
+    return "libx264"
+
+
+def _encoder_args(encoder: str, crf: int) -> list[str]:
+    if encoder == "libx264":
+        return ["-c:v", encoder, "-crf", str(crf), "-preset", "veryfast"]
+    if encoder == "h264_nvenc":
+        return ["-c:v", encoder, "-preset", "p5", "-rc", "vbr", "-cq", str(crf)]
+    if encoder == "h264_qsv":
+        return ["-c:v", encoder, "-global_quality", str(crf)]
+    if encoder == "h264_videotoolbox":
+        # No CRF mode: map CRF 0..51 onto the constant-quality scale 100..1 (higher is better).
+        # `-allow_sw` keeps it working on hosts without the HW block.
+        quality = max(1, round(100 - crf * 99 / 51))
+        return ["-c:v", encoder, "-q:v", str(quality), "-allow_sw", "1"]
+    return ["-c:v", encoder]
+
+
+def _is_compile_error(exc: BaseException) -> bool:
+    try:
+        from torch._dynamo.exc import TorchDynamoException
+    except ImportError:
+        return False
+    # Covers BackendCompilerFailed, which wraps Inductor failures.
+    return isinstance(exc, TorchDynamoException)
+
+
+def _pipe_frames_to_ffmpeg(cmd: list[str], frames: Any) -> None:
+    """Run `cmd` (reading rawvideo from stdin) and stream the (H, W, 3) uint8 frames to it."""
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    assert proc.stdin is not None
+    try:
+        for frame in frames:
+            proc.stdin.write(memoryview(frame))  # contiguous row of the array, no copy
+    except BrokenPipeError:
+        pass  # ffmpeg exited early; its exit code below carries the failure.
+    finally:
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+
+def _enable_sdpa_attention(pipe: object) -> bool:
+    try:
+        import torch.nn.functional as F
+        from diffusers.models.attention_processor import AttnProcessor2_0
+    except ImportError:
+        return False
+    unet = getattr(pipe, "unet", None)
+    if not hasattr(F, "scaled_dot_product_attention") or not hasattr(unet, "set_attn_processor"):
+        return False
+    try:
+        unet.set_attn_processor(AttnProcessor2_0())
+    except Exception:
+        return False
+    return True
+
+
+@dataclass(frozen=True, slots=True)
+class SvdOptions:
+    """Per-job SVD settings: job options over `AVATAR_SVD_*` settings, coerced once."""
+
+    model_id: str
+    revision: str | None
+    variant: str | None
+    local_files_only: bool
+    device: str  # auto | cuda | mps | cpu
+    dtype: str  # auto | float16 | float32 | bfloat16 (and aliases)
+    width: int
+    height: int
+    fps: int
+    num_frames: int
+    num_inference_steps: int
+    motion_bucket_id: int
+    noise_aug_strength: float
+    min_guidance_scale: float
+    max_guidance_scale: float
+    decode_chunk_size: int
+    decode_chunk_size_explicit: bool
+    seed: int | None
+    encode_crf: int
+    encoder: str
+    enable_attention_slicing: bool
+    enable_vae_slicing: bool
+    enable_vae_tiling: bool
+    enable_cpu_offload: bool
+    enable_xformers: bool
+    compile: bool
+    low_vram: bool
+    extend_to_audio: bool
+    extend_strategy: str  # freeze | loop
+    auto_downscale: bool
+    mps_max_pixels: int
+
+    @classmethod
+    def from_options(cls, options: dict[str, Any]) -> SvdOptions:
+        encode_crf_raw = options.get("svd_encode_crf", settings.svd_encode_crf)
+        try:
+            encode_crf = int(encode_crf_raw)
+        except (TypeError, ValueError):
+            encode_crf = int(settings.svd_encode_crf)
+
+        seed_opt = options.get("svd_seed", settings.svd_seed)
+
+        extend_strategy = str(options.get("svd_extend_strategy") or settings.svd_extend_strategy).strip().lower()
+        if extend_strategy not in {"freeze", "loop"}:
+            extend_strategy = "freeze"
+
+        encoder = str(options.get("svd_encoder") or settings.svd_encoder).strip().lower()
+
+        decode_chunk_size_raw = options.get("svd_decode_chunk_size")
+        variant = options.get("svd_variant") or settings.svd_variant
+        revision = options.get("svd_revision") or settings.svd_revision
+        return cls(
+            model_id=str(options.get("svd_model") or settings.svd_model).strip(),
+            revision=str(revision) if revision else None,
+            variant=str(variant) if variant else None,
+            local_files_only=_coerce_bool(options.get("svd_local_files_only"), settings.svd_local_files_only),
+            device=(options.get("svd_device") or settings.svd_device or "auto").strip().lower(),
+            dtype=str(options.get("svd_dtype") or settings.svd_dtype or "auto").strip().lower(),
+            width=int(options.get("svd_width") or settings.svd_width),
+            height=int(options.get("svd_height") or settings.svd_height),
+            fps=int(options.get("svd_fps") or settings.svd_fps),
+            num_frames=int(options.get("svd_num_frames") or settings.svd_num_frames),
+            num_inference_steps=int(options.get("svd_num_inference_steps") or settings.svd_num_inference_steps),
+            motion_bucket_id=int(options.get("svd_motion_bucket_id") or settings.svd_motion_bucket_id),
+            noise_aug_strength=float(options.get("svd_noise_aug_strength") or settings.svd_noise_aug_strength),
+            min_guidance_scale=float(options.get("svd_min_guidance_scale") or settings.svd_min_guidance_scale),
+            max_guidance_scale=float(options.get("svd_max_guidance_scale") or settings.svd_max_guidance_scale),
+            decode_chunk_size=int(decode_chunk_size_raw or settings.svd_decode_chunk_size),
+            decode_chunk_size_explicit=decode_chunk_size_raw is not None,
+            seed=int(seed_opt) if seed_opt is not None else None,
+            encode_crf=max(0, min(51, encode_crf)),
+            encoder=encoder if encoder in SVD_ENCODERS else "auto",
+            enable_attention_slicing=_coerce_bool(
+                options.get("svd_enable_attention_slicing"), settings.svd_enable_attention_slicing
+            ),
+            enable_vae_slicing=_coerce_bool(options.get("svd_enable_vae_slicing"), settings.svd_enable_vae_slicing),
+            enable_vae_tiling=_coerce_bool(options.get("svd_enable_vae_tiling"), settings.svd_enable_vae_tiling),
+            enable_cpu_offload=_coerce_bool(options.get("svd_enable_cpu_offload"), settings.svd_enable_cpu_offload),
+            enable_xformers=_coerce_bool(options.get("svd_enable_xformers"), settings.svd_enable_xformers),
+            compile=_coerce_bool(options.get("svd_compile"), settings.svd_compile),
+            low_vram=_coerce_bool(options.get("svd_low_vram"), settings.svd_low_vram),
+            extend_to_audio=_coerce_bool(options.get("svd_extend_to_audio"), settings.svd_extend_to_audio),
+            extend_strategy=extend_strategy,
+            auto_downscale=_coerce_bool(options.get("svd_auto_downscale"), settings.svd_auto_downscale),
+            mps_max_pixels=int(options.get("svd_mps_max_pixels") or settings.svd_mps_max_pixels or 0),
+        )
+
+
 class StableVideoDiffusionAvatarVideoGenerator:
     """
     Image → Video via Stable Video Diffusion (diffusers).
@@ -102,12 +302,52 @@ class StableVideoDiffusionAvatarVideoGenerator:
     - Model weights are expected to be available locally (or downloadable if network is enabled).
     """
 
+    option_keys = frozenset(
+        {
+            "svd_model",
+            "svd_revision",
+            "svd_variant",
+            "svd_local_files_only",
+            "svd_device",
+            "svd_dtype",
+            "svd_width",
+            "svd_height",
+            "svd_fps",
+            "svd_num_frames",
+            "svd_num_inference_steps",
+            "svd_motion_bucket_id",
+            "svd_noise_aug_strength",
+            "svd_min_guidance_scale",
+            "svd_max_guidance_scale",
+            "svd_decode_chunk_size",
+            "svd_seed",
+            "svd_encode_crf",
+            "svd_encoder",
+            "svd_enable_attention_slicing",
+            "svd_enable_vae_slicing",
+            "svd_enable_vae_tiling",
+            "svd_enable_cpu_offload",
+            "svd_low_vram",
+            "svd_enable_xformers",
+            "svd_compile",
+            "svd_extend_to_audio",
+            "svd_extend_strategy",
+            "svd_auto_downscale",
+            "svd_mps_max_pixels",
+        }
+    )
+
     def __init__(self) -> None:
         self._pipe: object | None = None
-        self._pipe_key: tuple[str, str, str] | None = None  # (model_id, device, dtype_str)
-
-    def _select_device(self, options: dict[str, Any]) -> str:
-        device_opt = (options.get("svd_device") or settings.svd_device or "auto").strip().lower()
+        # (model_id, device, dtype_str, low_vram, compile)
+        self._pipe_key: tuple[str, str, str, bool, bool] | None = None
+        # Uncompiled (unet, vae.decoder) of the cached pipe while torch.compile wrappers are installed.
+        self._eager_modules: tuple[object, object] | None = None
+        # `__call__` parameter names per pipeline class; inspect.signature() is slow and fixed per class.
+        self._call_params: dict[type, frozenset[str]] = {}
+
+    def _select_device(self, opts: SvdOptions) -> str:
+        device_opt = opts.device
         if device_opt and device_opt != "auto":
             return device_opt
 
@@ -122,8 +362,8 @@ class StableVideoDiffusionAvatarVideoGenerator:
             return "mps"
         return "cpu"
 
-    def _select_dtype(self, device: str, options: dict[str, Any]) -> tuple[object, str]:
-        dtype_opt = str(options.get("svd_dtype") or settings.svd_dtype or "auto").strip().lower()
+    def _select_dtype(self, device: str, opts: SvdOptions) -> tuple[object, str]:
+        dtype_opt = opts.dtype
         try:
             import torch
         except Exception as e:  # pragma: no cover - torch missing is handled elsewhere
@@ -138,6 +378,10 @@ class StableVideoDiffusionAvatarVideoGenerator:
 
         # auto
         if device == "cuda":
+            # bf16 runs at fp16 speed on Ampere+ but keeps fp32's exponent range, so the VAE decode
+            # can't overflow the way it does in fp16. Older GPUs stay on fp16.
+            if torch.cuda.is_bf16_supported():
+                return torch.bfloat16, "bfloat16"
             return torch.float16, "float16"
         if device == "mps":
             # MPS can be finicky; float16 saves memory, float32 may be more compatible.
@@ -145,10 +389,17 @@ class StableVideoDiffusionAvatarVideoGenerator:
             return torch.float16, "float16"
         return torch.float32, "float32"
 
-    def _load_pipe(self, *, model_id: str, device: str, dtype: object, dtype_str: str, options: dict[str, Any], progress_cb: ProgressCallback) -> object:
-        pipe_key = (model_id, device, dtype_str)
+    def _load_pipe(self, *, model_id: str, device: str, dtype: object, dtype_str: str, opts: SvdOptions, progress_cb: ProgressCallback) -> object:
+        # Offload and compilation are applied at load time, so a job that changes them gets a
+        # fresh pipeline. Both only take effect on CUDA.
+        cuda = device == "cuda"
+        pipe_key = (model_id, device, dtype_str, cuda and opts.low_vram, cuda and opts.compile)
         if self._pipe is not None and self._pipe_key == pipe_key:
             return self._pipe
+        # Drop the previous pipeline first so two copies of the weights never coexist.
+        self._pipe = None
+        self._pipe_key = None
+        self._eager_modules = None
 
         try:
             from diffusers import StableVideoDiffusionPipeline
@@ -159,15 +410,11 @@ class StableVideoDiffusionAvatarVideoGenerator:
                 "Then set AVATAR_GENERATOR_BACKEND=svd and configure AVATAR_SVD_MODEL."
             ) from e
 
-        local_only = _coerce_bool(options.get("svd_local_files_only"), settings.svd_local_files_only)
-        variant = options.get("svd_variant") or settings.svd_variant
-        revision = options.get("svd_revision") or settings.svd_revision
-
-        kwargs: dict[str, Any] = {"torch_dtype": dtype, "local_files_only": local_only}
-        if variant:
-            kwargs["variant"] = str(variant)
-        if revision:
-            kwargs["revision"] = str(revision)
+        kwargs: dict[str, Any] = {"torch_dtype": dtype, "local_files_only": opts.local_files_only}
+        if opts.variant:
+            kwargs["variant"] = opts.variant
+        if opts.revision:
+            kwargs["revision"] = opts.revision
 
         progress_cb(0.08, "SVD: loading model (first run can be slow)")
         try:
@@ -184,10 +431,7 @@ class StableVideoDiffusionAvatarVideoGenerator:
 
         pipe.set_progress_bar_config(disable=True)
 
-        enable_attention_slicing = _coerce_bool(
-            options.get("svd_enable_attention_slicing"), settings.svd_enable_attention_slicing
-        )
-        if enable_attention_slicing:
+        if opts.enable_attention_slicing:
             if hasattr(pipe, "enable_attention_slicing"):
                 try:
                     pipe.enable_attention_slicing()
@@ -201,8 +445,7 @@ class StableVideoDiffusionAvatarVideoGenerator:
                     except Exception:
                         progress_cb(0.09, "SVD: attention slicing not supported, continuing")
 
-        enable_vae_slicing = _coerce_bool(options.get("svd_enable_vae_slicing"), settings.svd_enable_vae_slicing)
-        if enable_vae_slicing:
+        if opts.enable_vae_slicing:
             if hasattr(pipe, "enable_vae_slicing"):
                 try:
                     pipe.enable_vae_slicing()
@@ -216,8 +459,7 @@ class StableVideoDiffusionAvatarVideoGenerator:
                     except Exception:
                         progress_cb(0.09, "SVD: VAE slicing not supported, continuing")
 
-        enable_vae_tiling = _coerce_bool(options.get("svd_enable_vae_tiling"), settings.svd_enable_vae_tiling)
-        if enable_vae_tiling:
+        if opts.enable_vae_tiling:
             if hasattr(pipe, "enable_vae_tiling"):
                 try:
                     pipe.enable_vae_tiling()
@@ -231,16 +473,43 @@ class StableVideoDiffusionAvatarVideoGenerator:
                     except Exception:
                         progress_cb(0.09, "SVD: VAE tiling not supported, continuing")
 
-        enable_xformers = _coerce_bool(options.get("svd_enable_xformers"), settings.svd_enable_xformers)
-        if enable_xformers and device == "cuda" and hasattr(pipe, "enable_xformers_memory_efficient_attention"):
-            try:
-                pipe.enable_xformers_memory_efficient_attention()
-                progress_cb(0.09, "SVD: xFormers enabled")
-            except Exception:
-                progress_cb(0.09, "SVD: xFormers not available, continuing")
-
-        enable_cpu_offload = _coerce_bool(options.get("svd_enable_cpu_offload"), settings.svd_enable_cpu_offload)
-        if enable_cpu_offload and device == "cuda":
+        if opts.enable_xformers and device == "cuda":
+            xformers_enabled = False
+            if hasattr(pipe, "enable_xformers_memory_efficient_attention"):
+                try:
+                    pipe.enable_xformers_memory_efficient_attention()
+                    xformers_enabled = True
+                    progress_cb(0.09, "SVD: xFormers enabled")
+                except Exception:
+                    pass
+            if not xformers_enabled:
+                # Without xFormers, PyTorch 2's fused SDPA (flash / mem-efficient kernels) gives the
+                # same O(N)-memory attention; it also replaces any sliced attention set above.
+                if _enable_sdpa_attention(pipe):
+                    progress_cb(0.09, "SVD: xFormers not available, using PyTorch SDPA attention")
+                else:
+                    progress_cb(0.09, "SVD: xFormers not available, continuing")
+
+        enable_cpu_offload = opts.enable_cpu_offload
+        low_vram = device == "cuda" and opts.low_vram
+        if low_vram:
+            # Low-VRAM profile, in the order diffusers recommends: stream weights layer by layer
+            # from host memory, then decode the VAE per frame and per spatial tile.
+            if not hasattr(pipe, "enable_sequential_cpu_offload"):
+                raise RuntimeError(
+                    "Low-VRAM mode requested, but this diffusers version doesn't support "
+                    "`enable_sequential_cpu_offload()`. Upgrade diffusers/accelerate or disable "
+                    "`AVATAR_SVD_LOW_VRAM`."
+                )
+            pipe.enable_sequential_cpu_offload()
+            vae = getattr(pipe, "vae", None)
+            if vae is not None:
+                if hasattr(vae, "enable_slicing"):
+                    vae.enable_slicing()
+                if hasattr(vae, "enable_tiling"):
+                    vae.enable_tiling()
+            progress_cb(0.09, "SVD: low-VRAM mode (sequential CPU offload, tiled VAE)")
+        elif enable_cpu_offload and device == "cuda":
             # Requires `accelerate`. Useful on small GPUs.
             if not hasattr(pipe, "enable_model_cpu_offload"):
                 raise RuntimeError(
@@ -252,11 +521,68 @@ class StableVideoDiffusionAvatarVideoGenerator:
         else:
             pipe.to(device)
 
+        if device == "cuda":
+            import torch
+
+            # Ampere+ runs fp32 matmuls/convs on TF32 tensor cores; cuDNN autotunes per shape.
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.allow_tf32 = True
+            torch.backends.cudnn.benchmark = True
+
+            if opts.compile and not (enable_cpu_offload or low_vram) and hasattr(torch, "compile"):
+                eager = (pipe.unet, pipe.vae.decoder)
+                try:
+                    pipe.unet = torch.compile(pipe.unet, mode="reduce-overhead", fullgraph=False)
+                    pipe.vae.decoder = torch.compile(pipe.vae.decoder, mode="reduce-overhead", fullgraph=False)
+                    self._eager_modules = eager
+                    progress_cb(0.09, "SVD: torch.compile enabled (first run compiles kernels)")
+                except Exception:
+                    pipe.unet, pipe.vae.decoder = eager
+                    progress_cb(0.09, "SVD: torch.compile not available, continuing")
+
         self._pipe = pipe
         self._pipe_key = pipe_key
         return pipe
 
-    def generate(
+    def _run_pipe(self, pipe: object, call_kwargs: dict[str, Any], *, seed: int | None, progress_cb: ProgressCallback) -> Any:
+        import torch
+
+        try:
+            with torch.inference_mode():
+                return pipe(**call_kwargs)  # type: ignore[misc]
+        except Exception as e:
+            if self._eager_modules is None or not _is_compile_error(e):
+                raise
+            # torch.compile is lazy: Dynamo/Inductor errors only surface on the first call (or a
+            # recompile for a new shape). Put the eager modules back for good and run again.
+            pipe.unet, pipe.vae.decoder = self._eager_modules  # type: ignore[attr-defined]
+            self._eager_modules = None
+            progress_cb(0.25, "SVD: torch.compile failed, continuing without it")
+            if seed is not None and "generator" in call_kwargs:
+                call_kwargs["generator"].manual_seed(seed)
+            with torch.inference_mode():
+                return pipe(**call_kwargs)  # type: ignore[misc]
+
+    async def generate(
+        self,
+        *,
+        image_path: Path,
+        audio_path: Path,
+        output_video_path: Path,
+        options: dict[str, Any],
+        progress_cb: ProgressCallback,
+    ) -> None:
+        # Model loading, diffusion and encoding are all blocking; keep them off the event loop.
+        await asyncio.to_thread(
+            self._generate,
+            image_path=image_path,
+            audio_path=audio_path,
+            output_video_path=output_video_path,
+            options=options,
+            progress_cb=progress_cb,
+        )
+
+    def _generate(
         self,
         *,
         image_path: Path,
@@ -265,23 +591,24 @@ class StableVideoDiffusionAvatarVideoGenerator:
         options: dict[str, Any],
         progress_cb: ProgressCallback,
     ) -> None:
-        ffmpeg = shutil.which("ffmpeg")
+        ffmpeg = _FFMPEG
         if not ffmpeg:
             raise RuntimeError("ffmpeg is required for the SVD backend (macOS: `brew install ffmpeg`).")
 
-        model_id = str(options.get("svd_model") or settings.svd_model).strip()
+        opts = SvdOptions.from_options(options)
+        model_id = opts.model_id
         if not model_id:
             raise RuntimeError("SVD model is not configured. Set `AVATAR_SVD_MODEL` (HF id or local path).")
 
-        device = self._select_device(options)
-        dtype, dtype_str = self._select_dtype(device, options)
+        device = self._select_device(opts)
+        dtype, dtype_str = self._select_dtype(device, opts)
 
         pipe = self._load_pipe(
             model_id=model_id,
             device=device,
             dtype=dtype,
             dtype_str=dtype_str,
-            options=options,
+            opts=opts,
             progress_cb=progress_cb,
         )
 
@@ -291,38 +618,21 @@ class StableVideoDiffusionAvatarVideoGenerator:
         except ImportError as e:  # pragma: no cover - only if env is broken
             raise RuntimeError("SVD backend missing required runtime deps (torch/Pillow).") from e
 
-        width = int(options.get("svd_width") or settings.svd_width)
-        height = int(options.get("svd_height") or settings.svd_height)
-        fps = int(options.get("svd_fps") or settings.svd_fps)
-        num_frames = int(options.get("svd_num_frames") or settings.svd_num_frames)
-        num_inference_steps = int(options.get("svd_num_inference_steps") or settings.svd_num_inference_steps)
-        motion_bucket_id = int(options.get("svd_motion_bucket_id") or settings.svd_motion_bucket_id)
-        noise_aug_strength = float(options.get("svd_noise_aug_strength") or settings.svd_noise_aug_strength)
-        min_guidance_scale = float(options.get("svd_min_guidance_scale") or settings.svd_min_guidance_scale)
-        max_guidance_scale = float(options.get("svd_max_guidance_scale") or settings.svd_max_guidance_scale)
-        decode_chunk_size_raw = options.get("svd_decode_chunk_size")
-        decode_chunk_size = int(decode_chunk_size_raw or settings.svd_decode_chunk_size)
-        if device == "mps" and decode_chunk_size_raw is None:
+        width = opts.width
+        height = opts.height
+        fps = opts.fps
+        num_frames = opts.num_frames
+        num_inference_steps = opts.num_inference_steps
+        decode_chunk_size = opts.decode_chunk_size
+        if device == "mps" and not opts.decode_chunk_size_explicit:
             # MPS often needs smaller decode chunks.
             decode_chunk_size = min(decode_chunk_size, 1)
-        encode_crf_raw = options.get("svd_encode_crf", settings.svd_encode_crf)
-        try:
-            encode_crf = int(encode_crf_raw)
-        except (TypeError, ValueError):
-            encode_crf = int(settings.svd_encode_crf)
-        encode_crf = max(0, min(51, encode_crf))
+        elif device == "cuda" and not opts.decode_chunk_size_explicit and opts.low_vram:
+            # The VAE decode is the memory peak; one frame at a time in low-VRAM mode.
+            decode_chunk_size = 1
 
-        seed_opt = options.get("svd_seed", settings.svd_seed)
-        seed = int(seed_opt) if seed_opt is not None else None
-
-        extend_to_audio = _coerce_bool(options.get("svd_extend_to_audio"), settings.svd_extend_to_audio)
-        extend_strategy = str(options.get("svd_extend_strategy") or settings.svd_extend_strategy).strip().lower()
-        if extend_strategy not in {"freeze", "loop"}:
-            extend_strategy = "freeze"
-
-        auto_downscale = _coerce_bool(options.get("svd_auto_downscale"), settings.svd_auto_downscale)
-        if device == "mps" and auto_downscale:
-            max_pixels = int(options.get("svd_mps_max_pixels") or settings.svd_mps_max_pixels or 0)
+        if device == "mps" and opts.auto_downscale:
+            max_pixels = opts.mps_max_pixels
             if max_pixels > 0 and width * height > max_pixels:
                 scale = math.sqrt(max_pixels / float(width * height))
                 new_width = _round_down_to_multiple(max(256, int(width * scale)), 8)
@@ -332,12 +642,16 @@ class StableVideoDiffusionAvatarVideoGenerator:
                     width, height = new_width, new_height
 
         progress_cb(0.18, "SVD: preparing input image")
-        image = Image.open(image_path).convert("RGB")
+        image = Image.open(image_path)
+        # JPEG: let libjpeg decode at 1/2, 1/4 or 1/8 scale when the photo is much larger than
+        # the target (still >= width x height, so LANCZOS below keeps full quality). No-op otherwise.
+        image.draft("RGB", (width, height))
+        image = image.convert("RGB")
         image = ImageOps.fit(image, (width, height), method=Image.LANCZOS)
 
         gen = None
-        if seed is not None:
-            gen = torch.Generator(device=device).manual_seed(seed)
+        if opts.seed is not None:
+            gen = torch.Generator(device=device).manual_seed(opts.seed)
 
         progress_cb(0.25, "SVD: generating frames")
 
@@ -345,25 +659,31 @@ class StableVideoDiffusionAvatarVideoGenerator:
             image=image,
             num_frames=num_frames,
             num_inference_steps=num_inference_steps,
-            min_guidance_scale=min_guidance_scale,
-            max_guidance_scale=max_guidance_scale,
-            motion_bucket_id=motion_bucket_id,
-            noise_aug_strength=noise_aug_strength,
+            min_guidance_scale=opts.min_guidance_scale,
+            max_guidance_scale=opts.max_guidance_scale,
+            motion_bucket_id=opts.motion_bucket_id,
+            noise_aug_strength=opts.noise_aug_strength,
             decode_chunk_size=decode_chunk_size,
         )
         if gen is not None:
             call_kwargs["generator"] = gen
 
         # Optional progress callback, depending on diffusers version.
-        try:
-            sig = inspect.signature(pipe.__call__)  # type: ignore[attr-defined]
-        except Exception:
-            sig = None
-        if sig and "height" in sig.parameters:
+        params = self._call_params.get(type(pipe))
+        if params is None:
+            try:
+                params = frozenset(inspect.signature(pipe.__call__).parameters)  # type: ignore[attr-defined]
+            except Exception:
+                params = frozenset()
+            self._call_params[type(pipe)] = params
+        if "output_type" in params:
+            # Frames come back as one float array instead of N PIL images.
+            call_kwargs["output_type"] = "np"
+        if "height" in params:
             call_kwargs["height"] = height
-        if sig and "width" in sig.parameters:
+        if "width" in params:
             call_kwargs["width"] = width
-        if sig and "callback" in sig.parameters and "callback_steps" in sig.parameters:
+        if "callback" in params and "callback_steps" in params:
             call_kwargs["callback_steps"] = 1
 
             def _cb(step: int, _timestep: int, _latents: object) -> None:
@@ -372,7 +692,7 @@ class StableVideoDiffusionAvatarVideoGenerator:
                 progress_cb(0.25 + 0.5 * frac, f"SVD: denoising {step + 1}/{num_inference_steps}")
 
             call_kwargs["callback"] = _cb
-        elif sig and "callback_on_step_end" in sig.parameters:
+        elif "callback_on_step_end" in params:
 
             def _cb_on_end(_pipe: object, step: int, _timestep: int, callback_kwargs: dict[str, Any]) -> dict[str, Any]:
                 frac = float(step + 1) / float(max(1, num_inference_steps))
@@ -382,8 +702,7 @@ class StableVideoDiffusionAvatarVideoGenerator:
             call_kwargs["callback_on_step_end"] = _cb_on_end
 
         try:
-            with torch.inference_mode():
-                result = pipe(**call_kwargs)  # type: ignore[misc]
+            result = self._run_pipe(pipe, call_kwargs, seed=opts.seed, progress_cb=progress_cb)
         except RuntimeError as e:
             msg = str(e)
             msg_lower = msg.lower()
@@ -402,7 +721,7 @@ class StableVideoDiffusionAvatarVideoGenerator:
                     f"Original error: {msg}"
                 ) from e
             raise
-        frames: list[Any] = list(result.frames[0])  # list[PIL.Image.Image]
+        frames = _frames_to_uint8(result.frames[0])  # (N, H, W, 3) uint8
         if device == "mps" and dtype_str == "float16" and _looks_like_all_black_video(frames):
             raise RuntimeError(
                 "SVD produced nearly-black frames on MPS with float16 (known instability).\n"
@@ -411,78 +730,68 @@ class StableVideoDiffusionAvatarVideoGenerator:
                 "`AVATAR_SVD_NUM_FRAMES=6`, `AVATAR_SVD_NUM_INFERENCE_STEPS=20`."
             )
 
-        if extend_to_audio and fps > 0 and len(frames) > 0:
+        frames_to_encode: Any = frames
+        if opts.extend_to_audio and fps > 0 and len(frames) > 0:
             dur = _get_media_duration_seconds(audio_path)
             if dur and dur > 0:
                 target_frames = int(math.ceil(dur * fps)) + 1
                 if target_frames > len(frames):
                     need = target_frames - len(frames)
-                    if extend_strategy == "loop" and len(frames) > 1:
-                        loop_src = frames[1:]
-                        extra: list[Any] = []
-                        while len(extra) < need:
-                            extra.extend(loop_src[: max(0, need - len(extra))])
-                        frames.extend(extra)
+                    # The tail is row views into `frames`, so no pixel data is duplicated; the
+                    # encoder just receives some rows more than once.
+                    if opts.extend_strategy == "loop" and len(frames) > 1:
+                        loop_len = len(frames) - 1
+                        extra = [frames[1 + i % loop_len] for i in range(need)]
                     else:
-                        frames.extend([frames[-1]] * need)
+                        extra = [frames[-1]] * need
+                    frames_to_encode = [*frames, *extra]
 
         progress_cb(0.82, "SVD: encoding video")
         output_video_path.parent.mkdir(parents=True, exist_ok=True)
 
-        with tempfile.TemporaryDirectory(prefix="svd_", dir=str(output_video_path.parent)) as tmpdir:
-            tmpdir_path = Path(tmpdir)
-            frames_dir = tmpdir_path / "frames"
-            frames_dir.mkdir(parents=True, exist_ok=True)
-            for idx, frame in enumerate(frames):
-                frame.save(frames_dir / f"frame_{idx:05d}.png")
-
-            silent_video = tmpdir_path / "video.mp4"
-            encode_cmd = [
-                ffmpeg,
-                "-y",
-                "-hide_banner",
-                "-loglevel",
-                "error",
-                "-framerate",
-                str(fps),
-                "-i",
-                str(frames_dir / "frame_%05d.png"),
-                "-c:v",
-                "libx264",
-                "-pix_fmt",
-                "yuv420p",
-                "-crf",
-                str(encode_crf),
-                "-preset",
-                "veryfast",
-                "-movflags",
-                "+faststart",
-                str(silent_video),
-            ]
-            subprocess.run(encode_cmd, check=True)
-
-            progress_cb(0.92, "SVD: muxing audio")
-            mux_cmd = [
-                ffmpeg,
-                "-y",
-                "-hide_banner",
-                "-loglevel",
-                "error",
-                "-i",
-                str(silent_video),
-                "-i",
-                str(audio_path),
-                "-c:v",
-                "copy",
-                "-c:a",
-                "aac",
-                "-b:a",
-                "192k",
-                "-shortest",
-                "-movflags",
-                "+faststart",
-                str(output_video_path),
-            ]
-            subprocess.run(mux_cmd, check=True)
+        frame_height, frame_width = frames.shape[1:3]
+        # One ffmpeg run: raw RGB24 frames on stdin (no PNG round trip per frame) plus the audio
+        # file, encoded and muxed straight into the result without a silent intermediate mp4.
+        # With `-shortest` ffmpeg may stop reading stdin early; that broken pipe is expected.
+        input_args = [
+            ffmpeg,
+            "-y",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "rgb24",
+            "-s",
+            f"{frame_width}x{frame_height}",
+            "-framerate",
+            str(fps),
+            "-i",
+            "-",
+            "-i",
+            str(audio_path),
+        ]
+        output_args = [
+            "-pix_fmt",
+            "yuv420p",
+            "-c:a",
+            "aac",
+            "-b:a",
+            "192k",
+            "-shortest",
+            "-movflags",
+            "+faststart",
+            str(output_video_path),
+        ]
+        encoder = _select_encoder(ffmpeg, opts.encoder, device)
+        try:
+            _pipe_frames_to_ffmpeg(input_args + _encoder_args(encoder, opts.encode_crf) + output_args, frames_to_encode)
+        except subprocess.CalledProcessError:
+            if encoder == "libx264":
+                raise
+            # Hardware encoders can be listed yet unusable (no device/session available).
+            progress_cb(0.9, f"SVD: {encoder} failed, re-encoding with libx264")
+            _pipe_frames_to_ffmpeg(input_args + _encoder_args("libx264", opts.encode_crf) + output_args, frames_to_encode)
 
         progress_cb(1.0, "Done")
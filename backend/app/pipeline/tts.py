@@ -4,6 +4,11 @@ import shutil
 import subprocess
 from pathlib import Path
 
+# External tools are looked up once per process (restart after installing one).
+_FFMPEG = shutil.which("ffmpeg")
+_SAY = shutil.which("say")
+_ESPEAK = shutil.which("espeak") or shutil.which("espeak-ng")
+
 
 def synthesize_text_to_wav(text: str, output_wav_path: Path) -> None:
     """
@@ -13,7 +18,7 @@ def synthesize_text_to_wav(text: str, output_wav_path: Path) -> None:
     Requires ffmpeg to convert intermediate formats to WAV.
     """
 
-    ffmpeg = shutil.which("ffmpeg")
+    ffmpeg = _FFMPEG
     if not ffmpeg:
         raise RuntimeError(
             "Text-to-speech requires ffmpeg to convert audio. "
@@ -22,7 +27,7 @@ def synthesize_text_to_wav(text: str, output_wav_path: Path) -> None:
 
     output_wav_path.parent.mkdir(parents=True, exist_ok=True)
 
-    say = shutil.which("say")
+    say = _SAY
     if say:
         tmp_aiff = output_wav_path.with_suffix(".aiff")
         subprocess.run([say, "-o", str(tmp_aiff), text], check=True)
@@ -33,7 +38,7 @@ def synthesize_text_to_wav(text: str, output_wav_path: Path) -> None:
         tmp_aiff.unlink(missing_ok=True)
         return
 
-    espeak = shutil.which("espeak") or shutil.which("espeak-ng")
+    espeak = _ESPEAK
     if espeak:
         tmp_wav = output_wav_path
         subprocess.run([espeak, "-w", str(tmp_wav), text], check=True)
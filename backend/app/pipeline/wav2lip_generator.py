@@ -7,7 +7,9 @@ from .base import ProgressCallback
 
 
 class Wav2LipAvatarVideoGenerator:
-    def generate(
+    option_keys: frozenset[str] = frozenset()
+
+    async def generate(
         self,
         *,
         image_path: Path,
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+import orjson
+
+from .jobs import Job, _utcnow, canonical_options
+from .models import JobStatus
+
+QUEUE_KEY = "jobs:queue"
+
+# Concurrent enqueues within this window are sent as one multi-value LPUSH.
+ENQUEUE_BATCH_WINDOW_S = 0.005
+ENQUEUE_BATCH_MAX = 50
+
+
+def _job_key(job_id: str) -> str:
+    return f"jobs:{job_id}"
+
+
+STATUS_KEY_PREFIX = "jobs:status:"
+
+# Read the current status, write the fields and move the id between status sets as one atomic
+# step, so concurrent updates can't leave an id in two sets and an update racing a delete can't
+# recreate a partial hash. KEYS[1] = job hash; ARGV = new status ("" to keep), job id,
+# status key prefix, then field/value pairs.
+_UPDATE_SCRIPT = """
+local prev = redis.call('HGET', KEYS[1], 'status')
+if not prev then
+    return false
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 4))
+local new = ARGV[1]
+if new ~= '' then
+    local old = cjson.decode(prev)
+    if old ~= new then
+        redis.call('SREM', ARGV[3] .. old, ARGV[2])
+        redis.call('SADD', ARGV[3] .. new, ARGV[2])
+    end
+end
+return redis.call('HGETALL', KEYS[1])
+"""
+
+
+def _status_key(status: JobStatus) -> str:
+    return f"{STATUS_KEY_PREFIX}{status.value}"
+
+
+def _encode_fields(fields: dict[str, Any]) -> dict[str, bytes]:
+    # Each field is a JSON value; Path is the only type orjson can't encode by itself.
+    return {name: orjson.dumps(value, default=str) for name, value in fields.items()}
+
+
+def _decode_job(raw: dict[str, str]) -> Job:
+    data = {name: orjson.loads(value) for name, value in raw.items()}
+    return Job(
+        job_id=data["job_id"],
+        status=JobStatus(data["status"]),
+        created_at=datetime.fromisoformat(data["created_at"]),
+        updated_at=datetime.fromisoformat(data["updated_at"]),
+        progress=float(data["progress"]),
+        message=data["message"],
+        error=data["error"],
+        input_image_path=Path(data["input_image_path"]),
+        input_audio_path=Path(data["input_audio_path"]),
+        output_video_path=Path(data["output_video_path"]),
+        options=data["options"],
+        # Jobs written before the field existed get it recomputed.
+        options_canonical=data.get("options_canonical") or canonical_options(data["options"]),
+        input_image_sha256=data.get("input_image_sha256"),
+        input_audio_sha256=data.get("input_audio_sha256"),
+    )
+
+
+def create_redis_client(url: str) -> Any:
+    try:
+        import redis.asyncio as redis
+    except ImportError as e:
+        raise RuntimeError(
+            "Redis queue backend requires extra dependencies. Install them with:\n"
+            "  poetry install --with redis   (or: pip install redis)\n"
+            "Or set AVATAR_QUEUE_BACKEND=memory."
+        ) from e
+    return redis.from_url(url, decode_responses=True)
+
+
+class RedisJobStore:
+    """Job state kept in one Redis hash per job, shared by every server process."""
+
+    def __init__(self, client: Any) -> None:
+        self._r = client
+        self._update_script = client.register_script(_UPDATE_SCRIPT)
+
+    async def create(
+        self,
+        *,
+        job_id: str | None = None,
+        input_image_path: Path,
+        input_audio_path: Path,
+        output_video_path: Path,
+        options: dict[str, Any],
+        input_image_sha256: str | None = None,
+        input_audio_sha256: str | None = None,
+    ) -> Job:
+        job_id = job_id or str(uuid4())
+        now = _utcnow()
+        job = Job(
+            job_id=job_id,
+            status=JobStatus.queued,
+            created_at=now,
+            updated_at=now,
+            progress=0.0,
+            message="Queued",
+            error=None,
+            input_image_path=input_image_path,
+            input_audio_path=input_audio_path,
+            output_video_path=output_video_path,
+            options=options,
+            options_canonical=canonical_options(options),
+            input_image_sha256=input_image_sha256,
+            input_audio_sha256=input_audio_sha256,
+        )
+        async with self._r.pipeline(transaction=True) as pipe:
+            pipe.hset(_job_key(job_id), mapping=_encode_fields(asdict(job)))
+            pipe.sadd(_status_key(job.status), job_id)
+            await pipe.execute()
+        return job
+
+    async def get(self, job_id: str) -> Job | None:
+        raw = await self._r.hgetall(_job_key(job_id))
+        if not raw:
+            return None
+        return _decode_job(raw)
+
+    async def count_by_status(self) -> dict[JobStatus, int]:
+        async with self._r.pipeline(transaction=False) as pipe:
+            for status in JobStatus:
+                pipe.scard(_status_key(status))
+            counts = await pipe.execute()
+        return dict(zip(JobStatus, counts))
+
+    async def update(
+        self,
+        job_id: str,
+        *,
+        status: JobStatus | None = None,
+        progress: float | None = None,
+        message: str | None = None,
+        error: str | None = None,
+    ) -> Job | None:
+        fields: dict[str, Any] = {"updated_at": _utcnow()}
+        if status is not None:
+            fields["status"] = status.value
+        if progress is not None:
+            fields["progress"] = float(progress)
+        if message is not None:
+            fields["message"] = message
+        if error is not None:
+            fields["error"] = error
+        args: list[Any] = [status.value if status is not None else "", job_id, STATUS_KEY_PREFIX]
+        for name, value in _encode_fields(fields).items():
+            args += (name, value)
+        flat = await self._update_script(keys=[_job_key(job_id)], args=args)
+        if not flat:
+            return None
+        return _decode_job(dict(zip(flat[::2], flat[1::2])))
+
+
+class RedisJobQueue:
+    """FIFO queue on a Redis list: producers LPUSH, every worker process BRPOPs."""
+
+    def __init__(self, client: Any) -> None:
+        self._r = client
+        self._pending: list[tuple[str, asyncio.Future[None]]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_tasks: set[asyncio.Task[None]] = set()
+
+    async def enqueue(self, job_id: str) -> None:
+        loop = asyncio.get_running_loop()
+        done: asyncio.Future[None] = loop.create_future()
+        self._pending.append((job_id, done))
+        if len(self._pending) >= ENQUEUE_BATCH_MAX:
+            self._start_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(ENQUEUE_BATCH_WINDOW_S, self._start_flush)
+        await done
+
+    def _start_flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._flush(batch))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, batch: list[tuple[str, asyncio.Future[None]]]) -> None:
+        try:
+            # LPUSH inserts left to right, so BRPOP still pops the batch in submission order.
+            await self._r.lpush(QUEUE_KEY, *(job_id for job_id, _ in batch))
+        except Exception as e:
+            for _, done in batch:
+                if not done.done():
+                    done.set_exception(e)
+            return
+        for _, done in batch:
+            if not done.done():
+                done.set_result(None)
+
+    async def dequeue(self) -> str:
+        _key, job_id = await self._r.brpop(QUEUE_KEY)
+        return job_id
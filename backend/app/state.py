@@ -1,7 +1,14 @@
 from __future__ import annotations
 
+from .config import settings
 from .jobs import JobQueue, JobStore
 
-job_store = JobStore()
-job_queue = JobQueue()
+if settings.queue_backend.strip().lower() == "redis":
+    from .redis_jobs import RedisJobQueue, RedisJobStore, create_redis_client
 
+    _redis = create_redis_client(settings.redis_url)
+    job_store: JobStore | RedisJobStore = RedisJobStore(_redis)
+    job_queue: JobQueue | RedisJobQueue = RedisJobQueue(_redis)
+else:
+    job_store = JobStore()
+    job_queue = JobQueue()
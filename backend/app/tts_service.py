@@ -1,19 +1,23 @@
 from __future__ import annotations
 
+import asyncio
 import shutil
 import subprocess
 from pathlib import Path
 
 from fastapi import HTTPException, UploadFile
 
+from .jobs import UPLOAD_CHUNK_SIZE, save_upload
 from .pipeline.tts import synthesize_text_to_wav
 
+_FFMPEG = shutil.which("ffmpeg")
+
 
 def _maybe_convert_to_wav(input_path: Path, output_path: Path) -> Path:
     if input_path.suffix.lower() == ".wav":
         return input_path
 
-    ffmpeg = shutil.which("ffmpeg")
+    ffmpeg = _FFMPEG
     if not ffmpeg:
         return input_path
 
@@ -43,28 +47,83 @@ def _maybe_convert_to_wav(input_path: Path, output_path: Path) -> Path:
     return output_path
 
 
+async def _convert_upload_to_wav(upload: UploadFile, output_path: Path) -> bool:
+    """Pipe the upload straight into ffmpeg; False if ffmpeg couldn't decode it from a stream."""
+    ffmpeg = _FFMPEG
+    if not ffmpeg:
+        return False
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    proc = await asyncio.create_subprocess_exec(
+        ffmpeg,
+        "-y",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-i",
+        "pipe:0",
+        "-ac",
+        "1",
+        "-ar",
+        "16000",
+        "-c:a",
+        "pcm_s16le",
+        str(output_path),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    assert proc.stdin is not None
+    try:
+        try:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                proc.stdin.write(chunk)
+                await proc.stdin.drain()
+            proc.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpeg gave up early; the exit code says so.
+        returncode = await proc.wait()
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    return returncode == 0 and output_path.exists() and output_path.stat().st_size > 0
+
+
 async def ensure_audio_for_request(
     *,
     job_id: str,
     uploads_dir: Path,
     text: str | None,
     audio_file: UploadFile | None,
-) -> Path:
+) -> tuple[Path, str | None]:
+    """
+    Produce the job's audio file. Returns its path and, when the uploaded bytes are used as-is,
+    their SHA-256 hex digest (None when the file was synthesized or converted).
+    """
     if text:
         audio_path = uploads_dir / "audio.wav"
         try:
-            synthesize_text_to_wav(text, audio_path)
+            await asyncio.to_thread(synthesize_text_to_wav, text, audio_path)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"TTS failed: {e}") from e
-        return audio_path
+        return audio_path, None
 
     if audio_file and audio_file.filename:
         suffix = Path(audio_file.filename).suffix or ".wav"
-        audio_path = uploads_dir / f"audio{suffix}"
-        with audio_path.open("wb") as f:
-            f.write(await audio_file.read())
+        wav_path = uploads_dir / "audio.wav"
         try:
-            return _maybe_convert_to_wav(audio_path, uploads_dir / "audio.wav")
+            if suffix.lower() != ".wav":
+                # Convert while reading the upload, without writing the original format to disk.
+                if await _convert_upload_to_wav(audio_file, wav_path):
+                    return wav_path, None
+                # Some containers (e.g. m4a with the index at the end) need a seekable input.
+                await audio_file.seek(0)
+            audio_path = uploads_dir / f"audio{suffix}"
+            digest = await save_upload(audio_file, audio_path)
+            result_path = await asyncio.to_thread(_maybe_convert_to_wav, audio_path, wav_path)
+            return result_path, (digest if result_path == audio_path else None)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Audio preprocessing failed: {e}") from e
 
@@ -1,32 +1,158 @@
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
+import functools
 import hashlib
-import json
+import io
+import mmap
+import os
 import shutil
+import time
 from pathlib import Path
-from typing import Any
+from uuid import uuid4
+
+import orjson
 
 from .config import settings
-from .jobs import persist_job_meta
+from .jobs import Job, persist_job_meta_async
 from .models import JobStatus
 from .pipeline.factory import build_generator
 from .state import job_queue, job_store
 
 
+# Progress updates closer together than this (in time and in value) are dropped.
+PROGRESS_MIN_INTERVAL_S = 0.1
+PROGRESS_MIN_DELTA = 0.005
+
+HASH_READ_SIZE = 8 << 20
+# Inputs at least this large are hashed from a read-only mapping instead of read() calls.
+HASH_MMAP_MIN_SIZE = 16 << 20
+
+# Image and audio are hashed side by side; OpenSSL releases the GIL while hashing. All file
+# hashing runs on these long-lived threads; the loop only combines the 32-byte digests.
+_HASH_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-hash")
+
+
+def _open_sequential(path: Path) -> io.FileIO:
+    f = open(path, "rb", buffering=0)
+    if hasattr(os, "posix_fadvise"):  # Not available on macOS/Windows.
+        # Whole-file reads front to back: widen readahead and start it now.
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+    return f
+
+
+def _prefetch_inputs(*paths: Path) -> None:
+    # WILLNEED outlives the descriptor, so the generator (possibly a subprocess) finds the
+    # inputs already in the page cache.
+    for path in paths:
+        with _open_sequential(path):
+            pass
+
+
 def _hash_file(hasher: "hashlib._Hash", path: Path) -> None:
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            hasher.update(chunk)
+    with _open_sequential(path) as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= HASH_MMAP_MIN_SIZE:
+            # OpenSSL reads the page cache directly: no copy into a user-space buffer at all.
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                hasher.update(mm)
+            return
+        # Unbuffered reads straight into one reusable buffer; at 8 MiB per call the Python loop
+        # overhead is negligible and there are 32x fewer read() syscalls than hashlib.file_digest's
+        # 256 KiB chunks. The buffer never exceeds the file size, so small images stay cheap.
+        buf = bytearray(max(1, min(size, HASH_READ_SIZE)))
+        view = memoryview(buf)
+        while n := f.readinto(buf):
+            hasher.update(view[:n])
 
 
-def _cache_key(image_path: Path, audio_path: Path, options: dict[str, Any]) -> str:
+@functools.lru_cache(maxsize=256)
+def _digest_for_fingerprint(path: str, size: int, mtime_ns: int, ino: int, dev: int) -> bytes:
+    # Keyed by the stat fingerprint, so an unchanged file is hashed once (e.g. a job retried
+    # with the same inputs) and any rewrite of it is a miss.
     hasher = hashlib.sha256()
-    # Bump when generation pipeline behavior changes (e.g. codec compatibility fixes).
-    hasher.update(b"avatar-video:v2\0")
-    hasher.update(b"backend\0")
-    hasher.update(settings.generator_backend.encode("utf-8"))
-    hasher.update(b"\0backend-config\0")
+    _hash_file(hasher, Path(path))
+    return hasher.digest()
+
+
+def _file_digest(path: Path) -> bytes:
+    st = os.stat(path)
+    return _digest_for_fingerprint(os.fspath(path), st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev)
+
+
+def _cache_entry_path(cache_dir: Path, key: str) -> Path:
+    # Two levels of 256-way fan-out keep directories small however large the cache grows.
+    return cache_dir / key[:2] / key[2:4] / f"{key}.mp4"
+
+
+def _store_in_cache(src: Path, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _fast_copy(src, path)
+
+
+def _cache_entry_ready(path: Path) -> bool:
+    # One stat() answers both "present" and "non-empty".
+    try:
+        return os.stat(path).st_size > 0
+    except FileNotFoundError:
+        return False
+
+
+def _fast_copy(src: Path, dst: Path) -> None:
+    # Results are never modified after a job finishes, so cache and output can share an inode.
+    # Everything goes through a temp name + rename: opening an existing `dst` for writing
+    # would truncate whatever file it is hardlinked to.
+    tmp = dst.with_name(f".{dst.name}.{uuid4().hex}.tmp")
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            _kernel_copy(src, tmp)
+            # Without this the rename can reach the disk before the data does, and a crash
+            # would leave a short file under the final name.
+            _fsync_file(tmp)
+        os.replace(tmp, dst)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _fsync_file(path: Path) -> None:
+    fd = os.open(path, os.O_RDWR)  # Windows only flushes handles opened for writing.
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _kernel_copy(src: Path, dst: Path) -> None:
+    if hasattr(os, "copy_file_range"):
+        # Linux: copy inside the kernel (a reflink on btrfs/XFS), no user-space buffers.
+        # The copyfile() fallback is zero-copy too (sendfile on Linux, fcopyfile on macOS).
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                return
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+
+
+@functools.lru_cache(maxsize=1)
+def _backend_config_bytes() -> bytes:
+    # Depends on settings only, which are fixed for the process lifetime.
     if settings.generator_backend == "sadtalker":
         backend_cfg = {
             "sadtalker_repo_dir": str(settings.sadtalker_repo_dir),
@@ -53,11 +179,13 @@ def _cache_key(image_path: Path, audio_path: Path, options: dict[str, Any]) -> s
             "svd_min_guidance_scale": settings.svd_min_guidance_scale,
             "svd_max_guidance_scale": settings.svd_max_guidance_scale,
             "svd_decode_chunk_size": settings.svd_decode_chunk_size,
+            "svd_encoder": settings.svd_encoder,
             "svd_seed": settings.svd_seed,
             "svd_enable_attention_slicing": settings.svd_enable_attention_slicing,
             "svd_enable_vae_slicing": settings.svd_enable_vae_slicing,
             "svd_enable_vae_tiling": settings.svd_enable_vae_tiling,
             "svd_enable_cpu_offload": settings.svd_enable_cpu_offload,
+            "svd_low_vram": settings.svd_low_vram,
             "svd_enable_xformers": settings.svd_enable_xformers,
             "svd_extend_to_audio": settings.svd_extend_to_audio,
             "svd_extend_strategy": settings.svd_extend_strategy,
@@ -66,19 +194,65 @@ def _cache_key(image_path: Path, audio_path: Path, options: dict[str, Any]) -> s
         }
     else:
         backend_cfg = {}
-    hasher.update(json.dumps(backend_cfg, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return orjson.dumps(backend_cfg, option=orjson.OPT_SORT_KEYS)
+
+
+@functools.lru_cache(maxsize=1)
+def _key_prefix_hasher() -> "hashlib._Hash":
+    # Everything before the per-job parts is fixed for the process; each key starts from a copy.
+    hasher = hashlib.sha256()
+    # Bump when generation pipeline behavior changes (e.g. codec compatibility fixes).
+    hasher.update(b"avatar-video:v4\0")
+    hasher.update(b"backend\0")
+    hasher.update(settings.generator_backend.encode("utf-8"))
+    hasher.update(b"\0backend-config\0")
+    hasher.update(_backend_config_bytes())
+    # v3: inputs contribute their own SHA-256 digests instead of their raw bytes.
+    # v4: config and options are canonicalized by orjson (non-ASCII kept as UTF-8).
     hasher.update(b"image\0")
-    _hash_file(hasher, image_path)
+    return hasher
+
+
+async def _input_digest(path: Path, known_sha256: str | None) -> bytes:
+    if known_sha256:
+        return bytes.fromhex(known_sha256)
+    return await asyncio.get_running_loop().run_in_executor(_HASH_EXECUTOR, _file_digest, path)
+
+
+async def _cache_key(job: Job) -> str:
+    # Digests recorded while the upload streamed in are used as-is; only the rest is read back.
+    image_digest, audio_digest = await asyncio.gather(
+        _input_digest(job.input_image_path, job.input_image_sha256),
+        _input_digest(job.input_audio_path, job.input_audio_sha256),
+    )
+    hasher = _key_prefix_hasher().copy()
+    hasher.update(image_digest)
     hasher.update(b"\0audio\0")
-    _hash_file(hasher, audio_path)
+    hasher.update(audio_digest)
     hasher.update(b"\0options\0")
-    hasher.update(json.dumps(options, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    hasher.update(job.options_canonical.encode("utf-8"))
     return hasher.hexdigest()
 
 
-async def worker_loop(stop_event: asyncio.Event) -> None:
+async def worker_loop(stop_event: asyncio.Event, generator_slots: asyncio.Semaphore) -> None:
+    """
+    Pull jobs from the queue until stopped.
+
+    Several loops can run side by side; they share `generator_slots`, so cache checks and
+    bookkeeping for one job overlap with another job's generation.
+    """
     generator = build_generator(settings.generator_backend)
     loop = asyncio.get_running_loop()
+    cache_dir = settings.storage_dir / settings.cache_dirname
+    if settings.enable_cache:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    # The loop only keeps weak references to tasks; hold progress updates until they finish.
+    progress_updates: set[asyncio.Task[object]] = set()
+
+    def send_progress(job_id: str, progress: float, message: str) -> None:
+        task = asyncio.create_task(job_store.update(job_id, progress=progress, message=message))
+        progress_updates.add(task)
+        task.add_done_callback(progress_updates.discard)
 
     while not stop_event.is_set():
         job_id = await job_queue.dequeue()
@@ -86,42 +260,78 @@ async def worker_loop(stop_event: asyncio.Event) -> None:
         if not job:
             continue
 
+        last_sent_at = 0.0
+        last_progress = -1.0
+        dropped: tuple[float, str] | None = None
+
         def progress_cb(progress: float, message: str) -> None:
-            asyncio.run_coroutine_threadsafe(
-                job_store.update(job_id, progress=progress, message=message), loop
-            )
+            nonlocal last_sent_at, last_progress, dropped
+            # Coalesce chatty generators (a call per denoising step / tqdm tick) into a few
+            # store updates; the final update always goes through.
+            now = time.monotonic()
+            if (
+                progress < 1.0
+                and now - last_sent_at < PROGRESS_MIN_INTERVAL_S
+                and abs(progress - last_progress) < PROGRESS_MIN_DELTA
+            ):
+                dropped = (progress, message)
+                return
+            last_sent_at, last_progress, dropped = now, progress, None
+            # Cheaper than run_coroutine_threadsafe: no concurrent Future to create and chain.
+            loop.call_soon_threadsafe(send_progress, job_id, progress, message)
+
+        async def flush_progress() -> None:
+            # Terminal updates must land after every progress update of the job: let queued
+            # callbacks create their tasks, wait for them, then apply the last coalesced tick.
+            await asyncio.sleep(0)
+            if progress_updates:
+                await asyncio.gather(*progress_updates, return_exceptions=True)
+            if dropped is not None:
+                await job_store.update(job_id, progress=dropped[0], message=dropped[1])
 
-        await job_store.update(job_id, status=JobStatus.running, progress=0.01, message="Starting")
+        # Hash any inputs without a recorded digest while the status update goes out. The
+        # lookup needs the key before generation, so it can't overlap with the generator itself.
+        pending_key = asyncio.create_task(_cache_key(job)) if settings.enable_cache else None
+        try:
+            await job_store.update(job_id, status=JobStatus.running, progress=0.01, message="Starting")
+        except BaseException:
+            if pending_key is not None:
+                pending_key.cancel()
+                # Already finished: retrieve the outcome so a hashing error isn't logged as lost.
+                if pending_key.done() and not pending_key.cancelled():
+                    pending_key.exception()
+            raise
         try:
-            if settings.enable_cache:
-                cache_dir = settings.storage_dir / settings.cache_dirname
-                cache_dir.mkdir(parents=True, exist_ok=True)
-                key = _cache_key(job.input_image_path, job.input_audio_path, job.options)
-                cached = cache_dir / f"{key}.mp4"
-                if cached.exists() and cached.stat().st_size > 0:
-                    job.output_video_path.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copyfile(cached, job.output_video_path)
+            cache_path: Path | None = None
+            if pending_key is not None:
+                # Inputs don't change during generation, so this key also names the stored result.
+                cache_key = await pending_key
+                cache_path = _cache_entry_path(cache_dir, cache_key)
+                if _cache_entry_ready(cache_path):
+                    # The job's outputs dir was created along with the job (see `create_job`).
+                    await asyncio.to_thread(_fast_copy, cache_path, job.output_video_path)
                     await job_store.update(job_id, progress=1.0, message="Ready (cache hit)")
                     await job_store.update(job_id, status=JobStatus.succeeded)
                     continue
 
-            await asyncio.to_thread(
-                generator.generate,
-                image_path=job.input_image_path,
-                audio_path=job.input_audio_path,
-                output_video_path=job.output_video_path,
-                options=job.options,
-                progress_cb=progress_cb,
-            )
-            if settings.enable_cache and job.output_video_path.exists():
-                key = _cache_key(job.input_image_path, job.input_audio_path, job.options)
-                cached = (settings.storage_dir / settings.cache_dirname) / f"{key}.mp4"
-                cached.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copyfile(job.output_video_path, cached)
+            # Warm the page cache while (possibly) waiting for a generator slot.
+            await asyncio.to_thread(_prefetch_inputs, job.input_image_path, job.input_audio_path)
+            async with generator_slots:
+                await generator.generate(
+                    image_path=job.input_image_path,
+                    audio_path=job.input_audio_path,
+                    output_video_path=job.output_video_path,
+                    options=job.options,
+                    progress_cb=progress_cb,
+                )
+            if cache_path is not None and job.output_video_path.exists():
+                await asyncio.to_thread(_store_in_cache, job.output_video_path, cache_path)
+            await flush_progress()
             await job_store.update(job_id, status=JobStatus.succeeded, progress=1.0, message="Ready")
         except Exception as e:
+            await flush_progress()
             await job_store.update(job_id, status=JobStatus.failed, progress=1.0, message="Failed", error=str(e))
         finally:
             latest = await job_store.get(job_id)
             if latest:
-                persist_job_meta(latest)
+                await persist_job_meta_async(latest)